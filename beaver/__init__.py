@@ -27,13 +27,17 @@ __license__ = 'MIT License'
 
 import argparse
 import glob
+import json
 import os
 import subprocess
 
 import jinja2
 
+import beaver.cache as cache
 import beaver.cli as cli
 import beaver.drivers as drivers
+import beaver.post as post
+import beaver.shard as shard
 
 
 
@@ -57,6 +61,30 @@ def run(cmd, stdin):
     return utf8_decoded
 
 
+def post_process(cmd, text, cache=None):
+    fn = post.resolve(cmd)
+    if fn is not None:
+        return fn(text)
+
+    if cache is None:
+        return run(cmd, text)
+
+    key = cache.key(cmd, text)
+    out = cache.get(key)
+    if out is None:
+        out = run(cmd, text)
+        cache.set(key, out)
+
+    return out
+
+
+def load_cache(namespace):
+    if not namespace.cache_dir:
+        return None
+
+    return cache.Cache(namespace.cache_dir, namespace.cache_size)
+
+
 def path_context(path):
     ctx = {}
     name = os.path.basename(path)
@@ -90,6 +118,21 @@ def load_template(path):
     return tpl
 
 
+def discover_inputs(patterns):
+    inputs = []
+    seen = set()
+
+    for pattern in patterns:
+        # Sort matches so that __index__ is the same on every machine.
+        for filename in sorted(glob.iglob(pattern, recursive=True)):
+            normalized = shard.normalize(filename)
+            if normalized not in seen:
+                seen.add(normalized)
+                inputs.append(filename)
+
+    return inputs
+
+
 def do_one(namespace):
     if not os.path.isfile(namespace.template):
         raise Exception("Invalid template file path")
@@ -102,8 +145,9 @@ def do_one(namespace):
     rendered = tpl.render(**context)
 
     if namespace.post:
+        post_cache = load_cache(namespace)
         for cmd in namespace.post:
-            rendered = run(cmd, rendered)
+            rendered = post_process(cmd, rendered, post_cache)
 
     if namespace.output:
         context["__index__"] = 0
@@ -123,26 +167,86 @@ def do_many(namespace):
     if not namespace.output:
         raise Exception("Must specify at least one output pattern")
 
-    inputs = []
-    for input_str in namespace.inputs:
-        for filename in glob.iglob(input_str, recursive=True):
-            inputs.append(filename)
+    inputs = discover_inputs(namespace.inputs)
 
-    for idx, input_file in enumerate(inputs):
-        context = drivers.parse(input_file)
-        tpl = load_template(namespace.template)
+    selected = (0, 1)
+    if namespace.shard:
+        selected = shard.parse(namespace.shard)
 
-        rendered = tpl.render(**context)
+    tpl = load_template(namespace.template)
+    post_cache = load_cache(namespace)
 
-        if namespace.post:
-            for cmd in namespace.post:
-                rendered = run(cmd, rendered)
+    processed = []
+    outputs = []
 
-        context["__index__"] = idx
-        output_path = write_output(input_file, namespace.output, context)
+    idx = 0
+    for input_file in inputs:
+        options = {"record": namespace.record, "query": namespace.query}
+
+        if shard.shard_of(input_file, selected[1]) != selected[0]:
+            # Keep __index__ consistent with an unsharded run.
+            idx += drivers.count_contexts(input_file, **options)
+            continue
+
+        for context in drivers.iter_contexts(input_file, **options):
+            rendered = tpl.render(**context)
+
+            if namespace.post:
+                for cmd in namespace.post:
+                    rendered = post_process(cmd, rendered, post_cache)
+
+            context["__index__"] = idx
+            output_path = write_output(input_file, namespace.output, context)
+
+            with open(output_path, 'w') as f:
+                f.write(rendered)
+
+            outputs.append(output_path)
+            idx += 1
+
+        processed.append(input_file)
+
+    if namespace.manifest:
+        shard.write_manifest(
+            namespace.manifest, selected, inputs, processed, outputs,
+        )
+
+
+def do_merge_manifests(namespace):
+    merged = shard.merge_manifests(namespace.manifests)
+
+    if namespace.output:
+        with open(namespace.output, 'w') as f:
+            json.dump(merged, f, indent=2, sort_keys=True)
+    else:
+        print("%s shards rendered %s inputs into %s outputs" % (
+            merged["count"], merged["total"], len(merged["outputs"]),
+        ))
+
+
+def do_convert(namespace):
+    if not namespace.inputs:
+        raise Exception("Must specify at least one input pattern")
+    if namespace.format not in drivers.writers:
+        raise Exception("Unsupported format: %s" % namespace.format)
+
+    for input_str in namespace.inputs:
+        for input_file in sorted(glob.iglob(input_str, recursive=True)):
+            context = drivers.parse(input_file)
+
+            if namespace.output:
+                output_path = write_output(
+                    input_file, namespace.output, context,
+                )
+            else:
+                name = os.path.splitext(input_file)[0]
+                output_path = "%s.%s" % (name, namespace.format)
+
+            try:
+                drivers.write(output_path, context)
+            except Exception as e:
+                raise Exception("Unable to convert %s: %s" % (input_file, e))
 
-        with open(output_path, 'w') as f:
-            f.write(rendered)
 
 def main():
     parser = cli.create_parser()
@@ -152,13 +256,19 @@ def main():
 
     if not command:
         parser.print_help()
-    elif command not in ['one', 'many']:
+    elif command not in ['one', 'many', 'merge-manifests', 'convert']:
         raise Exception("Invalid command: %s" % command)
 
+    drivers.trust_pickle = getattr(namespace, "trust_pickle", False)
+
     if command == 'one':
         do_one(namespace)
     elif command == 'many':
         do_many(namespace)
+    elif command == 'merge-manifests':
+        do_merge_manifests(namespace)
+    elif command == 'convert':
+        do_convert(namespace)
 
 if __name__ == "__main__":
     main()
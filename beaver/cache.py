@@ -0,0 +1,126 @@
+"""MIT License
+
+Copyright (c) 2017 Curtis La Graff
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import hashlib
+import os
+import tempfile
+
+
+DEFAULT_MAX_SIZE = 256 * 1024 * 1024
+
+# Eviction frees space down to this fraction of the maximum size, so that a
+# full cache is not rescanned on every miss.
+LOW_WATER_MARK = 0.9
+
+# Suffix of entries which are still being written, possibly by another
+# process sharing the cache. These are never counted or evicted.
+TMP_SUFFIX = ".tmp"
+
+
+class Cache(object):
+    """Post command output, keyed by the command and its input text."""
+
+    def __init__(self, path, max_size=DEFAULT_MAX_SIZE):
+        self.path = path
+        self.max_size = max_size
+        self.size = 0
+
+        os.makedirs(self.path, exist_ok=True)
+        for entry in self.entries():
+            self.size += entry[2]
+
+    def key(self, cmd, text):
+        digest = hashlib.sha256()
+        digest.update(cmd.encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(text.encode("utf-8"))
+        return digest.hexdigest()
+
+    def entry_path(self, key):
+        return os.path.join(self.path, key[0:2], key)
+
+    def entries(self):
+        """Return a list of (path, mtime, size) tuples for every entry."""
+        found = []
+        for dirpath, _, filenames in os.walk(self.path):
+            for filename in filenames:
+                if filename.endswith(TMP_SUFFIX):
+                    continue
+                path = os.path.join(dirpath, filename)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                found.append((path, stat.st_mtime, stat.st_size))
+        return found
+
+    def get(self, key):
+        path = self.entry_path(key)
+
+        try:
+            with open(path, "rb") as f:
+                value = f.read().decode("utf-8")
+            os.utime(path, None)
+        except (OSError, ValueError):
+            # Missing or corrupt entries are treated as a miss.
+            return None
+
+        return value
+
+    def set(self, key, value):
+        path = self.entry_path(key)
+        encoded = value.encode("utf-8")
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # Write to a temporary file first so concurrent readers never see a
+        # partially written entry.
+        fd, tmp_path = tempfile.mkstemp(
+            dir=os.path.dirname(path), suffix=TMP_SUFFIX,
+        )
+        with os.fdopen(fd, "wb") as f:
+            f.write(encoded)
+
+        if os.path.exists(path):
+            self.size -= os.path.getsize(path)
+        os.replace(tmp_path, path)
+        self.size += len(encoded)
+
+        if self.size > self.max_size:
+            self.evict()
+
+    def evict(self):
+        # Entries are read with a refreshed mtime, so the oldest mtime is
+        # the least recently used.
+        entries = sorted(self.entries(), key=lambda entry: entry[1])
+        self.size = sum(entry[2] for entry in entries)
+        target = self.max_size * LOW_WATER_MARK
+
+        for path, _, size in entries:
+            if self.size <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            self.size -= size
@@ -23,6 +23,9 @@ SOFTWARE.
 
 import argparse
 
+import beaver.cache as cache
+import beaver.drivers as drivers
+
 
 
 _one_epilog = """    Generate code for one file.
@@ -43,6 +46,25 @@ _one_epilog = """    Generate code for one file.
 
             Commands are ran in the order they are received.
 
+            Commands of the form "py:module:function" are not ran as external
+            processes. Instead, `function` is imported from `module` and called
+            in-process with the generated code, returning the new code. Plugins
+            registered under the "beaver.post" entry point group can be used
+            by name, e.g.: "py:name".
+
+        --cache-dir CACHE_DIR
+            Cache the output of external post commands in CACHE_DIR. The output is
+            keyed by the command and its input, so a command which receives code it
+            has already processed is not ran again.
+
+        --cache-size CACHE_SIZE
+            Maximum size of the cache, in bytes. The least recently used entries are
+            removed once it is exceeded. Defaults to 256 MiB.
+
+        --trust-pickle
+            Allow .pickle input files to be loaded. Loading a pickle can execute
+            arbitrary code, so only use this for files you have produced yourself.
+
         TEMPLATE
             Specify a template which will be used to generate code files. The template file
             can contain Jinja2-style variables (e.g.: "{{foobar}}").\n
@@ -50,7 +72,11 @@ _one_epilog = """    Generate code for one file.
             These placeholders will be replaced by their counterparts as specified in the input file.
 
         INPUT
-            Specify a path to an input file. This can be a JSON, Yaml, INI, or XML file.
+            Specify a path to an input file. This can be a JSON, Yaml, INI, XML,
+            MessagePack (.msgpack), CBOR (.cbor) or pickle (.pickle) file.
+
+            CSV (.csv) and SQLite (.sqlite or .db) files hold one context per row,
+            and can only be rendered with `beaver many`.
             The data represented in this file will be used to replace the placeholders
             present in the template.
 
@@ -94,8 +120,8 @@ _many_epilog = """    Generate code for multiple files.
                     Example: yaml
 
                 {{__index__}}
-                    An index representing how many previous input files have been
-                    evauluated.
+                    An index representing how many previous input files (or records)
+                    have been evauluated.
                     Example: 0
 
             If you specify an output which will not change, it will be overridden
@@ -110,6 +136,55 @@ _many_epilog = """    Generate code for multiple files.
 
             Commands are ran in the order they are received.
 
+            Commands of the form "py:module:function" are not ran as external
+            processes. Instead, `function` is imported from `module` and called
+            in-process with the generated code, returning the new code. Plugins
+            registered under the "beaver.post" entry point group can be used
+            by name, e.g.: "py:name".
+
+        --cache-dir CACHE_DIR
+            Cache the output of external post commands in CACHE_DIR. The output is
+            keyed by the command and its input, so a command which receives code it
+            has already processed is not ran again.
+
+        --cache-size CACHE_SIZE
+            Maximum size of the cache, in bytes. The least recently used entries are
+            removed once it is exceeded. Defaults to 256 MiB.
+
+        --record RECORD
+            Render every element named RECORD in an XML input as its own file,
+            instead of rendering the whole document once. Each record is streamed
+            from the input and receives its own {{__index__}}.
+
+            The context for each record is keyed by the element name, e.g.:
+            {{item.name}} when using `--record item`.
+
+            A bare name such as `item` matches the element in any namespace. Use
+            Clark notation, e.g.: `{http://example.com/ns}item`, to only match
+            the element in one namespace. Namespace prefixes are not supported.
+            The record is always keyed by its local name, while namespaced elements
+            inside of it are keyed in Clark notation.
+
+        --query QUERY
+            The SQL query to run against SQLite (.sqlite or .db) inputs. Every row
+            returned is rendered as its own file, with its columns as the context.
+
+        --shard INDEX/COUNT
+            Only render the inputs belonging to shard INDEX of COUNT, so that a large
+            job can be split across COUNT machines. Inputs are assigned to shards by
+            a hash of their normalized path, and INDEX starts at 0.
+
+            {{__index__}} is the same as it would be in an unsharded run.
+
+        --manifest MANIFEST
+            Write a JSON manifest of the shard, the inputs it processed and the
+            outputs it wrote to MANIFEST. Use `beaver merge-manifests` to verify that
+            the manifests of every shard cover all of the inputs without overlapping.
+
+        --trust-pickle
+            Allow .pickle input files to be loaded. Loading a pickle can execute
+            arbitrary code, so only use this for files you have produced yourself.
+
         TEMPLATE
             Specify a template which will be used to generate code files. The template file
             can contain Jinja2-style variables (e.g.: "{{foobar}}").\n
@@ -118,9 +193,15 @@ _many_epilog = """    Generate code for multiple files.
 
         INPUTS
             Specify one or more paths to an input files. You can also use glob
-            patterns, (e.g.: *.json).
+            patterns, (e.g.: *.json). Files matching a pattern are evaluated in
+            sorted order.
 
-            These files can be a JSON, Yaml, INI, or XML file.
+            These files can be a JSON, Yaml, INI, XML, MessagePack (.msgpack),
+            CBOR (.cbor) or pickle (.pickle) file.
+
+            CSV (.csv) and SQLite (.sqlite or .db) files are record sources: every
+            row is streamed from the file and rendered as its own output, with its
+            own {{__index__}}.
             The data represented in this file will be used to replace the placeholders
             present in the template.
 
@@ -128,11 +209,56 @@ _many_epilog = """    Generate code for multiple files.
 """
 
 
+_merge_manifests_epilog = """    Verify and merge the manifests written by `beaver many --shard`.
+
+    flags and arguments:
+        -o OUTPUT
+            Write the merged manifest to OUTPUT. Otherwise a summary is displayed
+            to STDOUT.
+
+        MANIFESTS
+            Specify the manifest written by each shard.
+
+            An error is raised if a shard is missing or repeated, if the shards
+            were ran against different inputs, or if any input or output was
+            produced by more than one shard.
+"""
+
+
+_convert_epilog = """    Convert input files into a binary format which loads faster.
+
+    flags and arguments:
+        -o OUTPUT
+            Specify the output for each of the converted files by passing a pattern,
+            in the same way as `beaver many`. By default, each file is written next
+            to its input, with the extension replaced by FORMAT.
+
+        --trust-pickle
+            Allow .pickle input files to be loaded.
+
+        FORMAT
+            The format to convert to: msgpack, cbor or pickle.
+
+        INPUTS
+            Specify one or more paths to input files. You can also use glob
+            patterns, (e.g.: *.yaml).
+
+
+    example:
+
+        $ beaver convert msgpack defs/*.yaml
+        $ beaver many struct.tpl '{{__name__}}.go' defs/*.msgpack
+"""
+
+
 def populate_one_cmd(parser):
     parser.add_argument('template', action='store', help='Path to the template file.',)
     parser.add_argument('input', action='store', help='Path to input file.',)
     parser.add_argument('-o', action='store', dest="output", help='Path to output file instead of StdOut.',)
     parser.add_argument('--post', action='append', dest="post", default=[], help='Command(s) which will receive the generated code after it is rendered.',)
+    parser.add_argument('--trust-pickle', action='store_true', dest="trust_pickle", help='Allow loading .pickle input files.',)
+    parser.add_argument('--cache-dir', action='store', dest="cache_dir", help='Directory used to cache the output of post commands.',)
+    parser.add_argument('--cache-size', action='store', dest="cache_size", type=int, default=cache.DEFAULT_MAX_SIZE, help='Maximum size of the post command cache, in bytes.',)
 
 
 def populate_many_cmd(parser):
@@ -140,6 +266,25 @@ def populate_many_cmd(parser):
     parser.add_argument('output', action='store', help='Output pattern for creating output files.')
     parser.add_argument('inputs', action='store', nargs="+", help='Input patterns')
     parser.add_argument('--post', action='append', dest="post", default=[], help='Command(s) which will receive the generated code after it is rendered.',)
+    parser.add_argument('--trust-pickle', action='store_true', dest="trust_pickle", help='Allow loading .pickle input files.',)
+    parser.add_argument('--cache-dir', action='store', dest="cache_dir", help='Directory used to cache the output of post commands.',)
+    parser.add_argument('--cache-size', action='store', dest="cache_size", type=int, default=cache.DEFAULT_MAX_SIZE, help='Maximum size of the post command cache, in bytes.',)
+    parser.add_argument('--record', action='store', dest="record", help='XML element to render as its own output file.',)
+    parser.add_argument('--query', action='store', dest="query", help='SQL query selecting the rows of SQLite inputs.',)
+    parser.add_argument('--shard', action='store', dest="shard", help='Only render the inputs of shard INDEX/COUNT.',)
+    parser.add_argument('--manifest', action='store', dest="manifest", help='Path to write a manifest of the rendered files.',)
+
+
+def populate_merge_manifests_cmd(parser):
+    parser.add_argument('manifests', action='store', nargs="+", help='Manifests written by each shard.')
+    parser.add_argument('-o', action='store', dest="output", help='Path to write the merged manifest.',)
+
+
+def populate_convert_cmd(parser):
+    parser.add_argument('format', action='store', choices=sorted(drivers.writers), help='Format to convert the inputs to.')
+    parser.add_argument('inputs', action='store', nargs="+", help='Input patterns')
+    parser.add_argument('-o', action='store', dest="output", help='Output pattern for creating output files.',)
+    parser.add_argument('--trust-pickle', action='store_true', dest="trust_pickle", help='Allow loading .pickle input files.',)
 
 
 def create_parser():
@@ -161,8 +306,24 @@ def create_parser():
         formatter_class=argparse.RawDescriptionHelpFormatter,
     )
 
+    merge_manifests = subparsers.add_parser(
+        'merge-manifests',
+        help='Verify and merge the manifests of a sharded run.',
+        epilog=_merge_manifests_epilog,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+
+    convert = subparsers.add_parser(
+        'convert',
+        help='Convert input files into a binary format.',
+        epilog=_convert_epilog,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+
     populate_one_cmd(one)
     populate_many_cmd(many)
+    populate_merge_manifests_cmd(merge_manifests)
+    populate_convert_cmd(convert)
 
 
 
@@ -21,13 +21,42 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 """
 
+import contextlib
+import csv
+import datetime
 import json
 import configparser
+import mmap
+import os
+import pickle
+import sqlite3
+import tempfile
+import urllib.parse
+import xml.etree.ElementTree as ElementTree
 import yaml
 import xmldict
 
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import cbor2
+except ImportError:
+    cbor2 = None
+
 
 extension_handlers = {}
+record_handlers = {}
+writers = {}
+
+# Number of rows fetched from SQLite at a time.
+SQLITE_BATCH_SIZE = 1000
+
+# Unpickling can execute arbitrary code, so pickle inputs are refused unless
+# they have been explicitly marked as trusted (see `--trust-pickle`).
+trust_pickle = False
 
 
 def get_ext(path):
@@ -38,6 +67,10 @@ def get_ext(path):
 
 def parse(path):
     ext = get_ext(path)
+    if ext not in extension_handlers and ext in record_handlers:
+        raise Exception(
+            "Extension %s holds one context per row, use `beaver many`" % ext
+        )
     if ext not in extension_handlers:
         raise Exception("Extension not supported: %s" % ext)
 
@@ -45,6 +78,31 @@ def parse(path):
     return parser(path)
 
 
+def _record_handler(path, options):
+    handler, option = record_handlers.get(get_ext(path), (None, None))
+    if handler is None or (option and not options.get(option)):
+        return None
+    return handler
+
+
+def iter_contexts(path, **options):
+    # Record handlers stream any number of contexts, everything else is
+    # parsed as a single context.
+    handler = _record_handler(path, options)
+    if handler is None:
+        yield parse(path)
+        return
+
+    for ctx in handler(path, **options):
+        yield ctx
+
+
+def count_contexts(path, **options):
+    if _record_handler(path, options) is None:
+        return 1
+    return sum(1 for _ in iter_contexts(path, **options))
+
+
 def register(ext):
     def outer(fn):
         extension_handlers[ext] = fn
@@ -55,6 +113,36 @@ def register(ext):
     return outer
 
 
+def write(path, data):
+    ext = get_ext(path)
+    if ext not in writers:
+        raise Exception("Extension not supported for writing: %s" % ext)
+
+    writer = writers[ext]
+    writer(path, data)
+
+
+def register_writer(ext):
+    def outer(fn):
+        writers[ext] = fn
+
+        def inner(*args, **kwargs):
+            return fn(*args, **kwargs)
+        return inner
+    return outer
+
+
+def register_records(ext, option=None):
+    # When `option` is given, the handler is only used if that option is set.
+    def outer(fn):
+        record_handlers[ext] = (fn, option)
+
+        def inner(*args, **kwargs):
+            return fn(*args, **kwargs)
+        return inner
+    return outer
+
+
 @register("json")
 def parse_json(path):
     content = ""
@@ -94,15 +182,268 @@ def read_ini(path):
 
     return data
 
+
+def _xml_leaf(elem):
+    # Convert an element without children the same way `xmldict` does.
+    attribs = elem.items()
+    val = None
+
+    if attribs:
+        val = dict(("@%s" % k, v) for k, v in attribs)
+        if elem.text:
+            converted = _xml_text(elem)
+            val["#text"] = elem.text
+            if converted != elem.text:
+                val["#value"] = converted
+    elif elem.text:
+        val = _xml_text(elem)
+
+    return val
+
+
+def _xml_text(elem):
+    text = elem.text.strip()
+    convertor = xmldict._val_and_maybe_convert.convertors.get(elem.get("type"))
+    if convertor:
+        return convertor(text)
+    return text
+
+
+def _xml_matches(tag, record):
+    # `{ns}tag` must match exactly, a bare name matches in any namespace.
+    if record.startswith("{"):
+        return tag == record
+    return tag.rpartition("}")[2] == record
+
+
+def _iterparse_xml(path, record=None):
+    # Yields (tag, value) for the root, or for each outermost `record`
+    # element. Converted elements are cleared and detached from their parent
+    # so only the open branch of the tree is held in memory.
+    #
+    # One frame per open element: (element, children dict or None). A frame
+    # of None means the element is outside of any record being captured.
+    stack = []
+
+    for event, elem in ElementTree.iterparse(path, events=("start", "end")):
+        if event == "start":
+            capturing = (
+                record is None or
+                _xml_matches(elem.tag, record) or
+                (stack and stack[-1][1] is not None)
+            )
+            stack.append((elem, {} if capturing else None))
+            continue
+
+        children = stack.pop()[1]
+        parent = stack[-1] if stack else None
+
+        if children is not None:
+            value = children if children else _xml_leaf(elem)
+
+            if parent is None or parent[1] is None:
+                yield elem.tag, value
+            elif elem.tag in parent[1]:
+                # Multiple elements share this tag, make them a list
+                if not isinstance(parent[1][elem.tag], list):
+                    parent[1][elem.tag] = [parent[1][elem.tag]]
+                parent[1][elem.tag].append(value)
+            else:
+                parent[1][elem.tag] = value
+
+        elem.clear()
+        if parent is not None:
+            parent[0].remove(elem)
+
+
 @register("xml")
 def read_xml(path):
-    content = ""
     data = {}
 
-    with open(path, "r") as f:
-        content = f.read()
+    if os.path.getsize(path):
+        for tag, value in _iterparse_xml(path):
+            data[tag] = value
 
-    if content:
-        data = xmldict.xml_to_dict(content)
+    return data
+
+
+@register_records("xml", option="record")
+def read_xml_records(path, record, **options):
+    if os.path.getsize(path):
+        for tag, value in _iterparse_xml(path, record):
+            # Clark notation cannot be referenced from a template, so the
+            # record itself is keyed by its local name.
+            yield {tag.rpartition("}")[2]: value}
+
+
+@register_records("csv")
+def read_csv_records(path, **options):
+    with open(path, "r", newline="") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            # DictReader keys surplus fields by None, which cannot be used
+            # as a template variable.
+            if None in row:
+                raise Exception(
+                    "Row on line %s of %s has more fields than the header" %
+                    (reader.line_num, path)
+                )
+            yield row
+
+
+@register_records("sqlite")
+@register_records("db")
+def read_sqlite_records(path, query=None, batch_size=SQLITE_BATCH_SIZE,
+                        **options):
+    if not query:
+        raise Exception("A query is required for SQLite input: %s" % path)
+
+    uri = "file:%s?mode=ro" % urllib.parse.quote(os.path.abspath(path))
+    conn = sqlite3.connect(uri, uri=True)
+
+    try:
+        cursor = conn.execute(query)
+        if cursor.description is None:
+            raise Exception("Query returned no columns: %s" % query)
+
+        columns = [column[0] for column in cursor.description]
+
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+
+            for row in rows:
+                yield dict(zip(columns, row))
+    finally:
+        conn.close()
+
+
+@contextlib.contextmanager
+def _mapped(path):
+    # Empty files cannot be mapped, so None is yielded for them instead.
+    with open(path, "rb") as f:
+        if not os.fstat(f.fileno()).st_size:
+            yield None
+            return
+
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            yield mapped
+        finally:
+            mapped.close()
+
+
+def _require(module, name, ext):
+    if module is None:
+        raise Exception(
+            "The %s package is required for .%s files" % (name, ext)
+        )
+
+
+@register("msgpack")
+def read_msgpack(path):
+    _require(msgpack, "msgpack", "msgpack")
+    data = {}
+
+    with _mapped(path) as mapped:
+        if mapped is not None:
+            # Yaml and CBOR allow non-string keys, e.g.: `{1: one}`.
+            data = msgpack.unpackb(mapped, raw=False, strict_map_key=False)
+
+    return data
+
+
+@register("cbor")
+def read_cbor(path):
+    _require(cbor2, "cbor2", "cbor")
+    data = {}
+
+    # The decoder reads the stream incrementally, so no mapping is needed.
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size:
+            data = cbor2.load(f)
+
+    return data
+
+
+@register("pickle")
+def read_pickle(path):
+    if not trust_pickle:
+        raise Exception("Refusing to load untrusted pickle file: %s" % path)
+
+    data = {}
+
+    with _mapped(path) as mapped:
+        if mapped is not None:
+            data = pickle.load(mapped)
 
     return data
+
+
+@contextlib.contextmanager
+def _replacing(path):
+    # Write to a temporary file which only replaces `path` once it is
+    # complete, so a failed encode never leaves a truncated file behind.
+    fd, tmp_path = tempfile.mkstemp(
+        dir=os.path.dirname(path) or ".", suffix=".tmp",
+    )
+    try:
+        with os.fdopen(fd, "wb") as f:
+            yield f
+
+        # mkstemp creates the file as private; use the usual permissions.
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(tmp_path, 0o666 & ~umask)
+
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _date_text(obj):
+    # MessagePack has no date type, and CBOR none for times or naive
+    # datetimes; store the text the value renders as instead.
+    if isinstance(obj, (datetime.date, datetime.time)):
+        return str(obj)
+    raise TypeError("can not serialize %r object" % type(obj).__name__)
+
+
+def _cbor_default(encoder, obj):
+    encoder.encode(_date_text(obj))
+
+
+def _naive_to_text(obj):
+    # cbor2 rejects naive datetimes before consulting `default`.
+    if isinstance(obj, datetime.datetime) and obj.tzinfo is None:
+        return str(obj)
+    if isinstance(obj, dict):
+        return dict((k, _naive_to_text(v)) for k, v in obj.items())
+    if isinstance(obj, (list, tuple)):
+        return [_naive_to_text(v) for v in obj]
+    return obj
+
+
+@register_writer("msgpack")
+def write_msgpack(path, data):
+    _require(msgpack, "msgpack", "msgpack")
+
+    with _replacing(path) as f:
+        f.write(msgpack.packb(data, use_bin_type=True, default=_date_text))
+
+
+@register_writer("cbor")
+def write_cbor(path, data):
+    _require(cbor2, "cbor2", "cbor")
+
+    with _replacing(path) as f:
+        cbor2.dump(_naive_to_text(data), f, default=_cbor_default)
+
+
+@register_writer("pickle")
+def write_pickle(path, data):
+    with _replacing(path) as f:
+        pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
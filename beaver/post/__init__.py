@@ -0,0 +1,86 @@
+"""MIT License
+
+Copyright (c) 2017 Curtis La Graff
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import importlib
+
+
+ENTRY_POINT_GROUP = "beaver.post"
+PREFIX = "py:"
+
+processors = {}
+
+
+def register(name):
+    def outer(fn):
+        processors[name] = fn
+
+        def inner(*args, **kwargs):
+            return fn(*args, **kwargs)
+        return inner
+    return outer
+
+
+def entry_points(group):
+    try:
+        from importlib.metadata import entry_points as _entry_points
+    except ImportError:
+        import pkg_resources
+        return list(pkg_resources.iter_entry_points(group))
+
+    eps = _entry_points()
+    if hasattr(eps, "select"):
+        return list(eps.select(group=group))
+    return list(eps.get(group, []))
+
+
+def load_plugins():
+    """Register every post-processor advertised under the `beaver.post`
+    entry point group. Processors registered explicitly take precedence."""
+    for ep in entry_points(ENTRY_POINT_GROUP):
+        if ep.name not in processors:
+            processors[ep.name] = ep.load()
+
+
+def resolve(cmd):
+    """Return the in-process callable for a `--post` command, or None if the
+    command should be ran as an external process.
+
+    `py:module:function` imports `function` from `module`, while `py:name`
+    looks up `name` in the registry of post-processors."""
+    if not cmd.startswith(PREFIX):
+        return None
+
+    spec = cmd[len(PREFIX):]
+    if ":" in spec:
+        module_name, fn_name = spec.split(":", 1)
+        module = importlib.import_module(module_name)
+        fn = getattr(module, fn_name, None)
+    else:
+        if spec not in processors:
+            load_plugins()
+        fn = processors.get(spec)
+
+    if not callable(fn):
+        raise Exception("Invalid post-processor: %s" % cmd)
+
+    return fn
@@ -0,0 +1,154 @@
+"""MIT License
+
+Copyright (c) 2017 Curtis La Graff
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import hashlib
+import json
+import os
+
+
+def parse(spec):
+    """Parse an `INDEX/COUNT` shard specification into a tuple of ints."""
+    try:
+        index, count = [int(part) for part in spec.split("/")]
+    except ValueError:
+        raise Exception("Invalid shard, expected INDEX/COUNT: %s" % spec)
+
+    if count < 1 or not 0 <= index < count:
+        raise Exception(
+            "Invalid shard, expected 0 <= INDEX < COUNT: %s" % spec
+        )
+
+    return index, count
+
+
+def normalize(path):
+    return os.path.normpath(path).replace(os.sep, "/")
+
+
+def shard_of(path, count):
+    # Hash the normalized path so every machine agrees on the shard.
+    digest = hashlib.sha1(normalize(path).encode("utf-8")).hexdigest()
+    return int(digest, 16) % count
+
+
+def digest(paths):
+    """Return a digest identifying the complete set of discovered inputs."""
+    h = hashlib.sha1()
+    for path in sorted(normalize(p) for p in paths):
+        h.update(path.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def unique(paths):
+    found = []
+    seen = set()
+    for path in paths:
+        normalized = normalize(path)
+        if normalized not in seen:
+            seen.add(normalized)
+            found.append(normalized)
+    return found
+
+
+def write_manifest(path, shard, discovered, inputs, outputs):
+    index, count = shard
+    discovered = unique(discovered)
+    manifest = {
+        "shard": {"index": index, "count": count},
+        "total": len(discovered),
+        "digest": digest(discovered),
+        "inputs": unique(inputs),
+        # A constant output pattern may write the same file repeatedly.
+        "outputs": unique(outputs),
+    }
+
+    with open(path, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+
+def merge_manifests(paths):
+    """Verify the manifests of every shard cover all inputs exactly once."""
+    manifests = []
+    for path in paths:
+        with open(path, "r") as f:
+            manifests.append(json.load(f))
+
+    if not manifests:
+        raise Exception("Must specify at least one manifest")
+
+    first = manifests[0]
+    count = first["shard"]["count"]
+
+    seen_shards = set()
+    inputs = {}
+    outputs = {}
+
+    for path, manifest in zip(paths, manifests):
+        index = manifest["shard"]["index"]
+
+        if manifest["shard"]["count"] != count:
+            raise Exception("Manifest %s has a different shard count" % path)
+        if manifest["digest"] != first["digest"]:
+            raise Exception(
+                "Manifest %s was produced from different inputs" % path
+            )
+        if index in seen_shards:
+            raise Exception("Shard %s appears more than once" % index)
+        seen_shards.add(index)
+
+        for input_path in manifest["inputs"]:
+            if input_path in inputs:
+                raise Exception(
+                    "Input %s was processed by shards %s and %s" %
+                    (input_path, inputs[input_path], index)
+                )
+            inputs[input_path] = index
+
+        for output_path in manifest["outputs"]:
+            if output_path in outputs:
+                raise Exception(
+                    "Output %s was written by shards %s and %s" %
+                    (output_path, outputs[output_path], index)
+                )
+            outputs[output_path] = index
+
+    missing = sorted(set(range(count)) - seen_shards)
+    if missing:
+        raise Exception(
+            "Missing manifests for shards: %s" %
+            ", ".join(str(i) for i in missing)
+        )
+
+    if len(inputs) != first["total"]:
+        raise Exception(
+            "Shards processed %s of %s inputs" % (len(inputs), first["total"])
+        )
+
+    return {
+        "count": count,
+        "total": first["total"],
+        "digest": first["digest"],
+        "inputs": sorted(inputs),
+        "outputs": sorted(outputs),
+    }
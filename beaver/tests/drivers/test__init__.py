@@ -1,6 +1,12 @@
+import datetime
+import os
+import sqlite3
+import tempfile
 import unittest
 import unittest.mock as mock
 
+import jinja2
+
 import beaver.drivers as drivers
 
 
@@ -8,3 +14,245 @@ class TestGetExt(unittest.TestCase):
     def test_empty_path(self):
         with self.assertRaises(Exception):
             drivers.get_ext("")
+
+
+class TestReadXml(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "input.xml")
+
+        with open(self.path, "w") as f:
+            f.write(
+                "<root>"
+                "<name>Foo</name>"
+                "<count type=\"integer\">3</count>"
+                "<item><id>1</id></item>"
+                "<item><id>2</id><tags><t>a</t><t>b</t></tags></item>"
+                "<empty/>"
+                "</root>"
+            )
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_same_shape_as_xmldict(self):
+        expected = {
+            "root": {
+                "name": "Foo",
+                "count": {"@type": "integer", "#text": "3", "#value": 3},
+                "item": [
+                    {"id": "1"},
+                    {"id": "2", "tags": {"t": ["a", "b"]}},
+                ],
+                "empty": None,
+            },
+        }
+
+        self.assertEqual(drivers.read_xml(self.path), expected)
+
+    def test_empty_file(self):
+        open(self.path, "w").close()
+
+        self.assertEqual(drivers.read_xml(self.path), {})
+
+    def test_records(self):
+        result = list(drivers.iter_contexts(self.path, record="item"))
+        expected = [
+            {"item": {"id": "1"}},
+            {"item": {"id": "2", "tags": {"t": ["a", "b"]}}},
+        ]
+
+        self.assertEqual(result, expected)
+
+    def test_namespaced_records(self):
+        with open(self.path, "w") as f:
+            f.write(
+                "<r xmlns=\"urn:x\" xmlns:y=\"urn:y\">"
+                "<item><name>1</name></item><y:item>2</y:item>"
+                "</r>"
+            )
+
+        self.assertEqual(
+            list(drivers.iter_contexts(self.path, record="item")),
+            [{"item": {"{urn:x}name": "1"}}, {"item": "2"}],
+        )
+        self.assertEqual(
+            list(drivers.iter_contexts(self.path, record="{urn:y}item")),
+            [{"item": "2"}],
+        )
+
+    def test_render_namespaced_record(self):
+        with open(self.path, "w") as f:
+            f.write("<r xmlns=\"urn:x\"><item>Foo</item></r>")
+
+        tpl = jinja2.Template("type {{ item }} struct{}")
+        contexts = drivers.iter_contexts(self.path, record="item")
+
+        self.assertEqual(
+            [tpl.render(**ctx) for ctx in contexts],
+            ["type Foo struct{}"],
+        )
+
+    def test_no_record(self):
+        result = list(drivers.iter_contexts(self.path))
+
+        self.assertEqual(result, [drivers.read_xml(self.path)])
+
+
+class TestBinaryFormats(unittest.TestCase):
+    data = {
+        "name": "Foo",
+        "attributes": {"ID": {"type": "int64"}},
+        "tags": [1, 2],
+        "codes": {1: "one", 2: "two"},
+    }
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def round_trip(self, ext):
+        path = os.path.join(self.dir.name, "input.%s" % ext)
+        drivers.write(path, self.data)
+        return drivers.parse(path)
+
+    @unittest.skipIf(drivers.msgpack is None, "msgpack is not installed")
+    def test_msgpack(self):
+        self.assertEqual(self.round_trip("msgpack"), self.data)
+
+    @unittest.skipIf(drivers.cbor2 is None, "cbor2 is not installed")
+    def test_cbor(self):
+        self.assertEqual(self.round_trip("cbor"), self.data)
+
+    @unittest.skipIf(drivers.msgpack is None, "msgpack is not installed")
+    def test_msgpack_dates(self):
+        path = os.path.join(self.dir.name, "input.msgpack")
+        drivers.write(path, {"when": datetime.date(2020, 1, 2)})
+
+        self.assertEqual(drivers.parse(path), {"when": "2020-01-02"})
+
+    @unittest.skipIf(drivers.cbor2 is None, "cbor2 is not installed")
+    def test_cbor_yaml_timestamps(self):
+        source = os.path.join(self.dir.name, "input.yaml")
+        with open(source, "w") as f:
+            f.write("when: 2020-01-02 03:04:05\nat: [2020-01-02]\n")
+
+        path = os.path.join(self.dir.name, "input.cbor")
+        drivers.write(path, drivers.parse(source))
+
+        self.assertEqual(
+            drivers.parse(path),
+            {"when": "2020-01-02 03:04:05", "at": [datetime.date(2020, 1, 2)]},
+        )
+
+    @unittest.skipIf(drivers.msgpack is None, "msgpack is not installed")
+    def test_msgpack_failed_write_keeps_file(self):
+        path = os.path.join(self.dir.name, "input.msgpack")
+        drivers.write(path, self.data)
+
+        with self.assertRaises(Exception):
+            drivers.write(path, {"bad": object()})
+
+        self.assertEqual(os.listdir(self.dir.name), ["input.msgpack"])
+        self.assertEqual(drivers.parse(path), self.data)
+
+    @unittest.skipIf(drivers.cbor2 is None, "cbor2 is not installed")
+    def test_failed_write_leaves_no_file(self):
+        path = os.path.join(self.dir.name, "input.cbor")
+
+        with self.assertRaises(Exception):
+            drivers.write(path, {"bad": object()})
+
+        self.assertEqual(os.listdir(self.dir.name), [])
+
+    @mock.patch("beaver.drivers.trust_pickle", True)
+    def test_pickle(self):
+        self.assertEqual(self.round_trip("pickle"), self.data)
+
+    def test_untrusted_pickle(self):
+        with self.assertRaises(Exception):
+            self.round_trip("pickle")
+
+    def test_empty_file(self):
+        path = os.path.join(self.dir.name, "input.pickle")
+        open(path, "w").close()
+
+        with mock.patch("beaver.drivers.trust_pickle", True):
+            self.assertEqual(drivers.parse(path), {})
+
+    def test_unsupported_writer(self):
+        with self.assertRaises(Exception):
+            drivers.write(os.path.join(self.dir.name, "output.txt"), self.data)
+
+
+class TestTabularRecords(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_csv(self):
+        path = os.path.join(self.dir.name, "input.csv")
+        with open(path, "w") as f:
+            f.write("name,type\nID,int64\nName,string\n")
+
+        result = list(drivers.iter_contexts(path))
+        expected = [
+            {"name": "ID", "type": "int64"},
+            {"name": "Name", "type": "string"},
+        ]
+
+        self.assertEqual(result, expected)
+        self.assertEqual(drivers.count_contexts(path), 2)
+
+    def test_sqlite(self):
+        path = os.path.join(self.dir.name, "input.db")
+        conn = sqlite3.connect(path)
+        conn.execute("CREATE TABLE entity (id INTEGER, name TEXT)")
+        conn.executemany(
+            "INSERT INTO entity VALUES (?, ?)",
+            [(i, "entity%s" % i) for i in range(5)],
+        )
+        conn.commit()
+        conn.close()
+
+        query = "SELECT id, name FROM entity WHERE id > 1 ORDER BY id"
+        result = list(drivers.read_sqlite_records(path, query, batch_size=2))
+        expected = [
+            {"id": 2, "name": "entity2"},
+            {"id": 3, "name": "entity3"},
+            {"id": 4, "name": "entity4"},
+        ]
+
+        self.assertEqual(result, expected)
+        self.assertEqual(
+            list(drivers.iter_contexts(path, query=query)), expected,
+        )
+
+        with self.assertRaisesRegex(Exception, "no columns"):
+            list(drivers.iter_contexts(path, query="PRAGMA foreign_keys=ON"))
+
+    def test_csv_extra_fields(self):
+        path = os.path.join(self.dir.name, "input.csv")
+        with open(path, "w") as f:
+            f.write("name,type\nID,int64,extra\n")
+
+        with self.assertRaisesRegex(Exception, "line 2"):
+            list(drivers.iter_contexts(path))
+
+    def test_parse_record_source(self):
+        path = os.path.join(self.dir.name, "input.csv")
+        with open(path, "w") as f:
+            f.write("name\nID\n")
+
+        with self.assertRaisesRegex(Exception, "beaver many"):
+            drivers.parse(path)
+
+    def test_sqlite_requires_query(self):
+        path = os.path.join(self.dir.name, "input.sqlite")
+
+        with self.assertRaises(Exception):
+            list(drivers.iter_contexts(path))
@@ -0,0 +1,39 @@
+import unittest
+import unittest.mock as mock
+
+import beaver.post as post
+
+
+class TestResolve(unittest.TestCase):
+    def test_external_command(self):
+        self.assertIsNone(post.resolve("gofmt"))
+
+    def test_module_function(self):
+        fn = post.resolve("py:textwrap:dedent")
+
+        self.assertEqual(fn("    foo"), "foo")
+
+    def test_missing_function(self):
+        with self.assertRaises(Exception):
+            post.resolve("py:textwrap:does_not_exist")
+
+    @mock.patch.dict("beaver.post.processors", {"upper": str.upper})
+    def test_registered_name(self):
+        self.assertEqual(post.resolve("py:upper")("foo"), "FOO")
+
+    @mock.patch("beaver.post.entry_points")
+    def test_entry_point_plugin(self, mock_entry_points):
+        ep = mock.Mock()
+        ep.name = "plugin"
+        ep.load.return_value = str.strip
+        mock_entry_points.return_value = [ep]
+
+        with mock.patch.dict("beaver.post.processors", {}):
+            self.assertEqual(post.resolve("py:plugin")(" foo "), "foo")
+
+    @mock.patch("beaver.post.entry_points")
+    def test_unknown_name(self, mock_entry_points):
+        mock_entry_points.return_value = []
+
+        with self.assertRaises(Exception):
+            post.resolve("py:unknown")
@@ -30,6 +30,63 @@ class TestRun(unittest.TestCase):
         beaver.run("echo", "some text goes here")
 
 
+class TestPostProcess(unittest.TestCase):
+    @mock.patch("beaver.run")
+    def test_external_command(self, mock_run):
+        mock_run.return_value = "formatted"
+
+        result = beaver.post_process("gofmt", "some text")
+
+        mock_run.assert_called_once_with("gofmt", "some text")
+        self.assertEqual(result, "formatted")
+
+    @mock.patch("beaver.run")
+    def test_in_process(self, mock_run):
+        result = beaver.post_process("py:textwrap:dedent", "    some text")
+
+        assert not mock_run.called
+        self.assertEqual(result, "some text")
+
+    @mock.patch("beaver.run")
+    def test_cache_hit(self, mock_run):
+        mock_cache = mock.Mock()
+        mock_cache.get.return_value = "cached"
+
+        result = beaver.post_process("gofmt", "some text", mock_cache)
+
+        assert not mock_run.called
+        self.assertEqual(result, "cached")
+
+    @mock.patch("beaver.run")
+    def test_cache_miss(self, mock_run):
+        mock_run.return_value = "formatted"
+        mock_cache = mock.Mock()
+        mock_cache.get.return_value = None
+
+        result = beaver.post_process("gofmt", "some text", mock_cache)
+
+        mock_run.assert_called_once_with("gofmt", "some text")
+        mock_cache.set.assert_called_once_with(
+            mock_cache.key.return_value, "formatted",
+        )
+        self.assertEqual(result, "formatted")
+
+
+class TestDiscoverInputs(unittest.TestCase):
+    @mock.patch("beaver.glob.iglob")
+    def test_overlapping_patterns(self, mock_iglob):
+        matches = {
+            "*.yaml": ["b.yaml", "a.yaml"],
+            "b.yaml": ["b.yaml"],
+            "./a.yaml": ["./a.yaml"],
+        }
+        mock_iglob.side_effect = lambda pattern, recursive: matches[pattern]
+
+        result = beaver.discover_inputs(["*.yaml", "b.yaml", "./a.yaml"])
+
+        self.assertEqual(result, ["a.yaml", "b.yaml"])
+
+
 class TestPathContext(unittest.TestCase):
     def test_path_context(self):
         # argument: expected
@@ -117,6 +174,7 @@ class TestDoOne(unittest.TestCase):
         mock_run, mock_write_output, mock_open
     ):
         m = mock.Mock()
+        m.cache_dir = None
         m.post = [
             "first",
             "second",
@@ -0,0 +1,89 @@
+import os
+import tempfile
+import unittest
+import unittest.mock as mock
+
+import beaver.cache as cache
+
+
+class TestCache(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_key(self):
+        c = cache.Cache(self.dir.name)
+
+        self.assertEqual(c.key("gofmt", "text"), c.key("gofmt", "text"))
+        self.assertNotEqual(c.key("gofmt", "text"), c.key("goimports", "text"))
+        self.assertNotEqual(c.key("gofmt", "text"), c.key("gofmt", "other"))
+
+    def test_get_set(self):
+        c = cache.Cache(self.dir.name)
+        key = c.key("gofmt", "text")
+
+        self.assertIsNone(c.get(key))
+
+        c.set(key, "formatted")
+        self.assertEqual(c.get(key), "formatted")
+
+        # A new instance sees entries written by a previous run.
+        self.assertEqual(cache.Cache(self.dir.name).get(key), "formatted")
+
+    def test_evicts_least_recently_used(self):
+        c = cache.Cache(self.dir.name, max_size=10)
+        first = c.key("cmd", "first")
+        second = c.key("cmd", "second")
+        third = c.key("cmd", "third")
+
+        c.set(first, "aaaa")
+        c.set(second, "bbbb")
+        os.utime(c.entry_path(first), (0, 0))
+        os.utime(c.entry_path(second), (1, 1))
+
+        c.set(third, "cccc")
+
+        self.assertIsNone(c.get(first))
+        self.assertEqual(c.get(second), "bbbb")
+        self.assertEqual(c.get(third), "cccc")
+        self.assertLessEqual(c.size, 10)
+
+    def test_evicts_below_max_size(self):
+        c = cache.Cache(self.dir.name, max_size=100)
+
+        for i in range(10):
+            key = c.key("cmd", str(i))
+            c.set(key, "a" * 10)
+            os.utime(c.entry_path(key), (i, i))
+
+        with mock.patch.object(c, "entries", wraps=c.entries) as entries:
+            c.set(c.key("cmd", "next"), "a" * 10)
+            c.set(c.key("cmd", "last"), "a" * 5)
+
+            # Only the first miss over the limit rescans the cache.
+            self.assertEqual(entries.call_count, 1)
+
+        self.assertLessEqual(c.size, 100 * cache.LOW_WATER_MARK + 5)
+
+    def test_skips_temporary_files(self):
+        c = cache.Cache(self.dir.name, max_size=10)
+        tmp_path = os.path.join(self.dir.name, "ab", "x" + cache.TMP_SUFFIX)
+        os.makedirs(os.path.dirname(tmp_path))
+        with open(tmp_path, "w") as f:
+            f.write("a" * 100)
+
+        c.set(c.key("cmd", "text"), "a" * 20)
+
+        self.assertTrue(os.path.exists(tmp_path))
+
+    def test_corrupt_entry(self):
+        c = cache.Cache(self.dir.name)
+        key = c.key("cmd", "text")
+        c.set(key, "formatted")
+
+        with open(c.entry_path(key), "wb") as f:
+            f.write(b"\xff\xfe")
+
+        self.assertIsNone(c.get(key))
@@ -0,0 +1,110 @@
+import json
+import os
+import tempfile
+import unittest
+
+import beaver.shard as shard
+
+
+class TestParse(unittest.TestCase):
+    def test_valid(self):
+        self.assertEqual(shard.parse("0/1"), (0, 1))
+        self.assertEqual(shard.parse("2/3"), (2, 3))
+
+    def test_invalid(self):
+        for spec in ["", "1", "a/b", "3/3", "-1/3", "0/0", "1/2/3"]:
+            with self.assertRaises(Exception):
+                shard.parse(spec)
+
+
+class TestShardOf(unittest.TestCase):
+    def test_normalized(self):
+        self.assertEqual(
+            shard.shard_of("dir/./file.json", 7),
+            shard.shard_of("dir/file.json", 7),
+        )
+
+    def test_single_shard(self):
+        self.assertEqual(shard.shard_of("dir/file.json", 1), 0)
+
+
+class TestMergeManifests(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.inputs = ["in/%s.json" % i for i in range(10)]
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def write(self, index, count, inputs=None):
+        if inputs is None:
+            inputs = [
+                p for p in self.inputs if shard.shard_of(p, count) == index
+            ]
+        outputs = [p.replace("in/", "out/") for p in inputs]
+
+        path = os.path.join(self.dir.name, "%s-%s.json" % (index, count))
+        shard.write_manifest(
+            path, (index, count), self.inputs, inputs, outputs,
+        )
+        return path
+
+    def test_full_coverage(self):
+        paths = [self.write(i, 3) for i in range(3)]
+
+        merged = shard.merge_manifests(paths)
+
+        self.assertEqual(merged["inputs"], sorted(self.inputs))
+        self.assertEqual(merged["total"], len(self.inputs))
+
+    def test_missing_shard(self):
+        paths = [self.write(i, 3) for i in range(2)]
+
+        with self.assertRaises(Exception):
+            shard.merge_manifests(paths)
+
+    def test_overlap(self):
+        paths = [self.write(0, 2), self.write(1, 2, self.inputs)]
+
+        with self.assertRaises(Exception):
+            shard.merge_manifests(paths)
+
+    def test_overlapping_outputs(self):
+        first = [p for p in self.inputs if shard.shard_of(p, 2) == 0]
+        second = [p for p in self.inputs if shard.shard_of(p, 2) == 1]
+        paths = [
+            os.path.join(self.dir.name, "0.json"),
+            os.path.join(self.dir.name, "1.json"),
+        ]
+
+        shard.write_manifest(paths[0], (0, 2), self.inputs, first, ["out/x"])
+        shard.write_manifest(
+            paths[1], (1, 2), self.inputs, second, ["out/./x"],
+        )
+
+        with self.assertRaises(Exception):
+            shard.merge_manifests(paths)
+
+    def test_duplicate_paths(self):
+        path = os.path.join(self.dir.name, "manifest.json")
+        shard.write_manifest(
+            path, (0, 1), self.inputs + ["./in/0.json"],
+            self.inputs + ["in/0.json"], ["out/x", "out/./x"],
+        )
+
+        merged = shard.merge_manifests([path])
+
+        self.assertEqual(merged["total"], len(self.inputs))
+        self.assertEqual(merged["outputs"], ["out/x"])
+
+    def test_incomplete(self):
+        paths = [self.write(i, 3) for i in range(3)]
+
+        with open(paths[0], "r") as f:
+            manifest = json.load(f)
+        manifest["inputs"] = manifest["inputs"][1:]
+        with open(paths[0], "w") as f:
+            json.dump(manifest, f)
+
+        with self.assertRaises(Exception):
+            shard.merge_manifests(paths)
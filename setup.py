@@ -142,6 +142,10 @@ setup(
     ],
     description=DESCRIPTION,
     install_requires=requirements,
+    extras_require={
+        'msgpack': ['msgpack'],
+        'cbor': ['cbor2'],
+    },
     long_description=LONG_DESCRIPTION,
     maintainer='Curtis La Graff',
     maintainer_email='curtis@lagraff.me',
@@ -150,6 +154,7 @@ setup(
         'beaver',
         'beaver.drivers',
         'beaver.cli',
+        'beaver.post',
     ],
     test_requires = ['nosetest'],
     test_suite = 'nose.collector',